@@ -1,6 +1,36 @@
-from maze import Direction, Maze, Point, UInt28
+from algorithm_numba import build_rb, build_tiled_rb, measure_distances_nb
+from maze import Maze, Point
 from tqdm import tqdm
+from typing import Callable
+import numpy as np
 import random
+import threading
+
+def _run_with_progress[T](description: str, total: int, kernel: Callable[[np.ndarray], T]) -> T:
+    """
+    Runs `kernel` while showing a progress bar, and returns whatever `kernel` returns.
+
+    Compiled kernels can't update a tqdm bar themselves, and updating it for every cell would be way too slow anyway.
+    Instead, `kernel` gets a 1-element counter it should bump every so often (see `PROGRESS_BATCH`).
+    A background thread polls that counter and moves the bar along.
+    That only works if the kernel releases the GIL while running, so make sure it is compiled with `nogil=True`.
+    """
+    progress = np.zeros(1, dtype=np.int64)
+    finished = threading.Event()
+
+    def report():
+        with tqdm(desc=description, total=total) as bar:
+            while not finished.wait(0.1):
+                bar.update(int(progress[0]) - bar.n)
+            bar.update(int(progress[0]) - bar.n)
+
+    reporter = threading.Thread(target=report)
+    reporter.start()
+    try:
+        return kernel(progress)
+    finally:
+        finished.set()
+        reporter.join()
 
 class MazeAlgorithm:
     """
@@ -30,77 +60,61 @@ class RecursiveBacktracker(MazeAlgorithm):
     def id() -> str:
         return "RecursiveBacktracker"
 
-    def shuffled_directions() -> list[Direction]:
-        """
-        Return a randomly shuffled list of all directions.
-        The recursive backtracking algorithm does not necessarily require direction shuffling, but it helps prevent direction bias.
-        """
-        return random.sample(list(Direction.all()), k=len(Direction.all()))
+    def build(self, maze: Maze, start_coordinates: Point):
+        shape = maze.shape()
+        if not maze.in_bounds(start_coordinates):
+            raise Exception(f"{start_coordinates} out of bounds for maze of size {shape}")
+
+        # The actual algorithm lives in `build_rb`, which Numba compiles to machine code.
+        # Derive the kernel's seed from Python's random generator so `--seed` still makes mazes reproducible.
+        seed = random.getrandbits(32)
+        _run_with_progress(
+            "build maze",
+            shape.x * shape.y,
+            lambda progress: build_rb(maze.corridors, start_coordinates.x, start_coordinates.y, seed, progress),
+        )
+
+class TiledRecursiveBacktracker(MazeAlgorithm):
+    """
+    A recursive backtracker that builds its maze in square tiles of `TILE_SIZE` cells, which are then connected into one big maze.
+
+    Each tile is small enough to stay in the CPU cache while it is being built.
+    Don't expect miracles from that, though: the plain `RecursiveBacktracker` already keeps most of its work in the cache.
+    Measured against it, this one was only a few milliseconds faster at 1920x1080 (roughly 0.07 seconds either way), and somewhere between 5% and 15% faster at 4096x4096.
+    The price is visible in the result: passages are confined to their tile, and neighboring tiles connect through a single opening at most.
+    """
+    def __init__(self):
+        super().__init__()
+
+    def id() -> str:
+        return "TiledRecursiveBacktracker"
 
     def build(self, maze: Maze, start_coordinates: Point):
-        cell = maze[start_coordinates]
-
-        if not cell:
-            raise Exception(f"{start_coordinates} out of bounds for maze of size {maze.shape()}")
-
-        # As the name implies, the recursive backtracking algorithm is supposed to be recursive.
-        # Unfortunately, a 1080 x 1920 maze would require a stack size of about 2 million.
-        # That's why the algorithm below uses a stack with a loop instead.
-
-        # The recursive backtracking algorithm goes as follows.
-        progress = tqdm(desc="build maze", total=maze.shape().x * maze.shape().y)
-        # 1. Pick any cell (the "root").
-        stack = [(cell, RecursiveBacktracker.shuffled_directions())]
-        while stack:
-            (cell, directions) = stack.pop()
-            # 2. Pick any direction from that cell.
-            for direction in directions:
-                # 3. If there is a neighboring cell in that direction...
-                neighbor = maze[cell.coordinates + direction.delta()]
-                if neighbor:
-                    # ...and that direction has not been visited yet...
-                    if not neighbor.has_neighbors():
-                        # 4. Open a corridor to that cell.
-                        cell.open_corridor(direction)
-                        # 5. Make that cell the current cell, then repeat from step 2.
-                        stack.append((cell, directions))
-                        stack.append((neighbor, RecursiveBacktracker.shuffled_directions()))
-                        # Once all neighboring cells are visited, that cell is complete.
-                        # Backtrack to a cell that still has unvisited neighbors.
-                        # The algorithm terminates once all neighbors of the root are visited.
-                        break
-            # This construct (the "for-else") is a weird Python thing which is useful in exactly one scenario: this one.
-            # The else triggers only if the for loop ends without triggering a break statement.
-            # Said for loop iterates through directions that have not yet been explored.
-            # If it is exhausted, then that means this cell has been explored in full.
-            else:
-                progress.update(1)
-        progress.close()
+        # Every tile picks its own starting point, so `start_coordinates` is ignored.
+        shape = maze.shape()
+        seed = random.getrandbits(32)
+        _run_with_progress(
+            "build maze",
+            shape.x * shape.y,
+            lambda progress: build_tiled_rb(maze.corridors, seed, progress),
+        )
 
 def measure_distance(maze: Maze, start_coordinates: Point):
-    cell = maze[start_coordinates]
-
-    if not cell:
-            raise Exception(f"{start_coordinates} out of bounds for maze of size {maze.shape()}")
-    # This algorithm is just depth-first search, but with manual tracking because the call stack would overflow if the algorithm were recursive.
-    progress = tqdm(desc="measure distance", total=maze.shape().x * maze.shape().y)
+    shape = maze.shape()
+    if not maze.in_bounds(start_coordinates):
+        raise Exception(f"{start_coordinates} out of bounds for maze of size {shape}")
+    # The search itself is `measure_distances_nb`, a breadth-first search compiled by Numba.
     # While the distance of a cell to itself is by definition always 0, we also need cells to store a value to denote they have not been visited yet.
     # Right now, all cells have a value of 0, making that the perfect sentinel.
-    # So use 1 as the minimum distance instead, and we'll compensate for that during painting.
-    stack = [(cell, 1)]
-    while stack:
-        # Grab the current cell.
-        (cell, distance) = stack.pop()
-        # Set the value of that cell to the distance from the root.
-        cell.set_value(UInt28.clamped(distance))
-
-        for neighbor in cell.reachable_neighbors():
-            if neighbor.value() == 0:
-                # Grab all neighbors that have not been visited yet and put them on the todo stack.
-                stack.append((neighbor, distance + 1))
-        progress.update()
-    progress.close()
+    # So the kernel uses 1 as the minimum distance instead, and we'll compensate for that during painting.
+    # The kernel hands back the largest distance it found, which saves painting a pass over every cell to find it again.
+    max_value = _run_with_progress(
+        "measure distance",
+        shape.x * shape.y,
+        lambda progress: measure_distances_nb(maze.corridors, maze.values, start_coordinates.x, start_coordinates.y, progress),
+    )
+    maze.values_changed(int(max_value))
 
 # This list has all the algorithms so the command-line parser knows about them.
 # If you write a new algorithm, make sure to add it here!
-ALGORITHMS = [RecursiveBacktracker]
+ALGORITHMS = [RecursiveBacktracker, TiledRecursiveBacktracker]
@@ -0,0 +1,356 @@
+from itertools import permutations
+from maze import DIR_CORRIDOR_BIT, EAST_BIT, SOUTH_BIT
+from numba import njit, prange
+import numpy as np
+
+# The kernels in this file operate directly on `Maze.corridors` and `Maze.values` instead of going through `Cell`.
+# Every `Cell` access costs a Python object, a lambda, and a tuple or two, which adds up quickly for a 1080 x 1920 maze.
+# Numba compiles these functions to machine code, so the loops below run without any of the interpreter overhead.
+#
+# The layout of both arrays is described in `Maze.__init__`; they are indexed as `[y, x]`.
+# Both are stored row by row, so the hottest loops flatten them and address a cell as `y * width + x` instead.
+#
+# The kernels read the size of the maze from the arrays they are given, so one compiled kernel (cached on disk by `cache=True`) works for every resolution.
+# Compiling a kernel per resolution instead, with the width and height baked in as constants, sounds like it should be faster.
+# In practice it made no measurable difference to `build_rb`: its bounds checks are a handful of integer comparisons, and the loop mostly waits on memory anyway.
+# So it's not worth compiling every kernel again for every new resolution.
+
+# Kernels report how many cells they finished through a `progress` counter, but only once every `PROGRESS_BATCH` cells.
+# (And once more when they are done.)
+# See `_run_with_progress` in `algorithm.py`.
+PROGRESS_BATCH = 4096
+
+# All 24 orders in which the 4 directions can be visited, as indices into the `DIR_*` arrays.
+# Picking one of these at random shuffles the directions without building a list every time.
+PERMS = np.array(list(permutations(range(4))), dtype=np.uint8)
+
+@njit(cache=True, nogil=True)
+def _new_rng(seed: int) -> np.ndarray:
+    """
+    Create the state of a random generator for `_random_below`.
+
+    The state is stored in a 1-element array so functions can share and advance it without passing it back and forth.
+    """
+    # Xorshift gets stuck on a state of 0, so mix the seed with a constant that has bits set well above the 32 bits of a seed.
+    return np.array([np.uint64(seed) ^ np.uint64(0x9e3779b97f4a7c15)], dtype=np.uint64)
+
+@njit(cache=True, nogil=True)
+def _random_below(rng: np.ndarray, n: int) -> int:
+    """
+    Returns a random integer in the range [0, `n`), advancing the random generator `rng`.
+
+    This is a xorshift64 generator: a handful of shifts and XORs per number, which beats calling into `np.random` in the innermost loop.
+    It is nowhere near good enough for cryptography, but it is plenty for mazes.
+    """
+    x = rng[0]
+    x ^= x << np.uint64(13)
+    x ^= x >> np.uint64(7)
+    x ^= x << np.uint64(17)
+    rng[0] = x
+    return np.int64(x % np.uint64(n))
+
+# Mazes built by `build_tiled_rb` are built in square tiles of this many cells wide and high.
+# A 64 x 64 tile needs a few dozen kilobytes of state, which comfortably fits in the L1 or L2 cache.
+TILE_SIZE = 64
+
+@njit(cache=True, nogil=True)
+def _build_rb_region(
+    corridors: np.ndarray,
+    width: int,
+    x0: int,
+    y0: int,
+    region_width: int,
+    region_height: int,
+    sx: int,
+    sy: int,
+    visited: np.ndarray,
+    stack: np.ndarray,
+    stack_cells: np.ndarray,
+    stack_perms: np.ndarray,
+    rng: np.ndarray,
+    finished: int,
+    progress: np.ndarray,
+) -> int:
+    """
+    Build a maze with the recursive backtracking algorithm in a region of `corridors`, starting at (`sx`, `sy`).
+
+    `corridors` is flattened, with rows of `width` cells.
+    The region is `region_width` x `region_height` cells, with its top left corner at (`x0`, `y0`).
+    `visited` needs a slot for every cell in the region plus a border of one cell around it; the stacks need one slot per cell in the region.
+    `finished` is the number of cells finished before this call; the return value is that number plus the cells in this region.
+    """
+    # As the name implies, the recursive backtracking algorithm is supposed to be recursive.
+    # Unfortunately, a 1080 x 1920 maze would require a stack size of about 2 million.
+    # That's why the algorithm below uses a stack with a loop instead.
+    # The stack only ever holds the path from the root to the current cell, so it never needs more than one slot per cell.
+    # Rather than the shuffled directions themselves, the stack stores which of the `PERMS` to use.
+
+    # Cells are tracked by their index into the flat `corridors` and by their index into `visited`, each with a stack of its own.
+    # In a flat array, the neighbors of a cell are a fixed offset away: one row up or down, or one cell left or right.
+    # The offsets below are indexed by direction, like the `DIR_*` arrays.
+    # `visited` has a border of cells around the region which are marked as visited up front.
+    # Cells outside the region then look like any other visited cell, so stepping to a neighbor needs no bounds checks at all.
+    # That border is also why `visited` needs indices of its own: its rows are 2 cells wider than the region.
+    padded_width = region_width + 2
+    visited[:(region_height + 2) * padded_width] = True
+    for y in range(region_height):
+        row = (y + 1) * padded_width + 1
+        visited[row:row + region_width] = False
+    visited_offsets = np.array([-padded_width, 1, padded_width, -1], dtype=np.int32)
+    cell_offsets = np.array([-width, 1, width, -1], dtype=np.int32)
+    # The corridors north and west are stored in the neighbor, see `Maze.__init__`.
+    corridor_offsets = np.array([-width, 0, 0, -1], dtype=np.int32)
+
+    # The recursive backtracking algorithm goes as follows.
+    # 1. Pick any cell (the "root").
+    start = (sy - y0 + 1) * padded_width + sx - x0 + 1
+    stack[0] = start
+    stack_cells[0] = sy * width + sx
+    stack_perms[0] = _random_below(rng, len(PERMS))
+    visited[start] = True
+    top = 1
+    while top > 0:
+        top -= 1
+        index = stack[top]
+        cell = stack_cells[top]
+        perm = stack_perms[top]
+        # 2. Pick any direction from that cell.
+        for i in range(4):
+            d = PERMS[perm, i]
+            neighbor = index + visited_offsets[d]
+            # 3. If there is a neighboring cell in that direction and that cell has not been visited yet...
+            if not visited[neighbor]:
+                # 4. Open a corridor to that cell.
+                corridors[cell + corridor_offsets[d]] |= DIR_CORRIDOR_BIT[d]
+                visited[neighbor] = True
+                # 5. Make that cell the current cell, then repeat from step 2.
+                stack[top] = index
+                stack_cells[top] = cell
+                stack_perms[top] = perm
+                top += 1
+                stack[top] = neighbor
+                stack_cells[top] = cell + cell_offsets[d]
+                stack_perms[top] = _random_below(rng, len(PERMS))
+                top += 1
+                # Once all neighboring cells are visited, that cell is complete.
+                # Backtrack to a cell that still has unvisited neighbors.
+                # The algorithm terminates once all neighbors of the root are visited.
+                break
+        # This construct (the "for-else") is a weird Python thing which is useful in exactly one scenario: this one.
+        # The else triggers only if the for loop ends without triggering a break statement.
+        # Said for loop iterates through directions that have not yet been explored.
+        # If it is exhausted, then that means this cell has been explored in full.
+        else:
+            finished += 1
+            if finished % PROGRESS_BATCH == 0:
+                progress[0] = finished
+    return finished
+
+@njit(cache=True, nogil=True)
+def build_rb(corridors: np.ndarray, sx: int, sy: int, seed: int, progress: np.ndarray):
+    """
+    Build a maze in `corridors` with the recursive backtracking algorithm, starting at (`sx`, `sy`).
+
+    See `RecursiveBacktracker.build` for the Python side of things.
+    """
+    rng = _new_rng(seed)
+    (height, width) = corridors.shape
+
+    stack = np.empty(width * height, dtype=np.int32)
+    stack_cells = np.empty(width * height, dtype=np.int32)
+    stack_perms = np.empty(width * height, dtype=np.uint8)
+    # A cell has been visited once it has a corridor, but finding that out means checking up to 4 corridors across 3 cells.
+    # Keeping track of visited cells separately turns that into a single lookup.
+    visited = np.empty((width + 2) * (height + 2), dtype=np.bool_)
+
+    progress[0] = _build_rb_region(corridors.reshape(-1), width, 0, 0, width, height, sx, sy, visited, stack, stack_cells, stack_perms, rng, 0, progress)
+
+@njit(cache=True, nogil=True)
+def build_tiled_rb(corridors: np.ndarray, seed: int, progress: np.ndarray):
+    """
+    Build a maze in `corridors` with the recursive backtracking algorithm, one tile of `TILE_SIZE` x `TILE_SIZE` cells at a time.
+
+    See `TiledRecursiveBacktracker.build` for the Python side of things.
+    """
+    rng = _new_rng(seed)
+    (height, width) = corridors.shape
+    flat_corridors = corridors.reshape(-1)
+    tiles_x = (width + TILE_SIZE - 1) // TILE_SIZE
+    tiles_y = (height + TILE_SIZE - 1) // TILE_SIZE
+
+    # The stacks and `visited` only need to hold a single tile (or the maze of tiles below, whichever is larger).
+    stack_size = max(TILE_SIZE * TILE_SIZE, tiles_x * tiles_y)
+    stack = np.empty(stack_size, dtype=np.int32)
+    stack_cells = np.empty(stack_size, dtype=np.int32)
+    stack_perms = np.empty(stack_size, dtype=np.uint8)
+    visited = np.empty(max((TILE_SIZE + 2) * (TILE_SIZE + 2), (tiles_x + 2) * (tiles_y + 2)), dtype=np.bool_)
+
+    # 1. Build a separate maze inside each tile, starting from a random cell in that tile.
+    finished = 0
+    for ty in range(tiles_y):
+        for tx in range(tiles_x):
+            x0 = tx * TILE_SIZE
+            y0 = ty * TILE_SIZE
+            x1 = min(x0 + TILE_SIZE, width)
+            y1 = min(y0 + TILE_SIZE, height)
+            sx = x0 + _random_below(rng, x1 - x0)
+            sy = y0 + _random_below(rng, y1 - y0)
+            finished = _build_rb_region(flat_corridors, width, x0, y0, x1 - x0, y1 - y0, sx, sy, visited, stack, stack_cells, stack_perms, rng, finished, progress)
+
+    # 2. Connect the tiles.
+    # Opening a wall between every pair of neighboring tiles would create loops, and a maze with loops has more than one way to get anywhere.
+    # Instead, build a maze out of the tiles themselves, treating every tile as a cell.
+    # Every corridor in that maze becomes a single opening at a random spot of the border between the two tiles it connects.
+    tile_corridors = np.zeros((tiles_y, tiles_x), dtype=np.uint8)
+    _build_rb_region(tile_corridors.reshape(-1), tiles_x, 0, 0, tiles_x, tiles_y, 0, 0, visited, stack, stack_cells, stack_perms, rng, 0, np.zeros(1, dtype=np.int64))
+    for ty in range(tiles_y):
+        for tx in range(tiles_x):
+            x0 = tx * TILE_SIZE
+            y0 = ty * TILE_SIZE
+            x1 = min(x0 + TILE_SIZE, width)
+            y1 = min(y0 + TILE_SIZE, height)
+            if tile_corridors[ty, tx] & SOUTH_BIT:
+                corridors[y1 - 1, x0 + _random_below(rng, x1 - x0)] |= SOUTH_BIT
+            if tile_corridors[ty, tx] & EAST_BIT:
+                corridors[y0 + _random_below(rng, y1 - y0), x1 - 1] |= EAST_BIT
+
+    progress[0] = finished
+
+@njit(cache=True, nogil=True)
+def measure_distances_nb(corridors: np.ndarray, values: np.ndarray, sx: int, sy: int, progress: np.ndarray) -> int:
+    """
+    Store the distance from (`sx`, `sy`) to every reachable cell in `values`, and return the largest of those distances.
+
+    See `measure_distance` for the Python side of things.
+    """
+    (height, width) = values.shape
+    # Work on flat views of both arrays, so a cell is a single index and its neighbors are `index ± width` and `index ± 1`.
+    flat_corridors = corridors.reshape(-1)
+    flat_values = values.reshape(-1)
+
+    # This is a breadth-first search, so cells are visited in order of their distance to the start.
+    # Every cell is queued at most once, so a flat queue with one slot per cell never overflows.
+    queue = np.empty(width * height, dtype=np.int32)
+
+    # A value of 0 means "not visited yet", so the minimum distance is 1.
+    # Distances are written when a cell is queued rather than when it is taken off the queue.
+    # That way a cell can never be queued twice, and the distance of a queued cell can be read right back from `values`.
+    start = sy * width + sx
+    queue[0] = start
+    flat_values[start] = 1
+    head = 0
+    tail = 1
+    while head < tail:
+        index = queue[head]
+        # Keep the distance within the 28 bits available for values.
+        distance = min(flat_values[index] + 1, 0xfffffff)
+        head += 1
+        if head % PROGRESS_BATCH == 0:
+            progress[0] = head
+
+        # The corridors south and east are stored in this cell, so one read covers both.
+        # A corridor can't lead out of the maze, so neither needs a bounds check.
+        cell = flat_corridors[index]
+        if cell & SOUTH_BIT and flat_values[index + width] == 0:
+            flat_values[index + width] = distance
+            queue[tail] = index + width
+            tail += 1
+        if cell & EAST_BIT and flat_values[index + 1] == 0:
+            flat_values[index + 1] = distance
+            queue[tail] = index + 1
+            tail += 1
+        # The corridors north and west are stored in the neighbors, which only exist away from the top row and the left column.
+        if index >= width and flat_corridors[index - width] & SOUTH_BIT and flat_values[index - width] == 0:
+            flat_values[index - width] = distance
+            queue[tail] = index - width
+            tail += 1
+        if index % width != 0 and flat_corridors[index - 1] & EAST_BIT and flat_values[index - 1] == 0:
+            flat_values[index - 1] = distance
+            queue[tail] = index - 1
+            tail += 1
+    progress[0] = head
+    # Cells are queued in order of their distance, so the last cell in the queue is (one of) the furthest away.
+    return flat_values[queue[tail - 1]]
+
+@njit(cache=True, parallel=True)
+def pack_rgb(values: np.ndarray, lut: np.ndarray, out: np.ndarray) -> int:
+    """
+    Look up the color of every cell in `values` in `lut` and write it to `out`.
+
+    `lut` has shape (number of values, 3) and holds a red, green, and blue byte for each value.
+    `out` has shape (height, width, 3), which is the shape PIL expects of an RGB image.
+    Rows are independent of one another, so they are split across all cores.
+
+    Returns the number of cells whose value is too big for `lut`; those are left untouched in `out`.
+    """
+    (height, width) = values.shape
+    size = lut.shape[0]
+    missing = 0
+    for y in prange(height):
+        for x in range(width):
+            value = values[y, x]
+            # Numba doesn't check bounds, so a value past the end of `lut` would read whatever memory follows it.
+            if value >= size:
+                missing += 1
+                continue
+            out[y, x, 0] = lut[value, 0]
+            out[y, x, 1] = lut[value, 1]
+            out[y, x, 2] = lut[value, 2]
+    return missing
+
+# The same constants `colorsys` uses, so `paint_lut` (and `_hls_to_rgb` in `palette.py`, which imports them from here) give the exact same colors as `colorsys.hls_to_rgb`.
+ONE_THIRD = 1.0 / 3.0
+ONE_SIXTH = 1.0 / 6.0
+TWO_THIRD = 2.0 / 3.0
+
+@njit(cache=True, nogil=True)
+def _hls_component(m1: float, m2: float, hue: float) -> float:
+    """
+    The helper `colorsys.hls_to_rgb` uses for each component.
+
+    `_hls_to_rgb` in `palette.py` has this same curve written out in place, so keep the two in sync.
+    """
+    hue = hue % 1.0
+    if hue < ONE_SIXTH:
+        return m1 + (m2 - m1) * hue * 6.0
+    if hue < 0.5:
+        return m2
+    if hue < TWO_THIRD:
+        return m1 + (m2 - m1) * (TWO_THIRD - hue) * 6.0
+    return m1
+
+@njit(cache=True, parallel=True)
+def paint_lut(t: np.ndarray, h0: float, s0: float, l0: float, h1: float, s1: float, l1: float, out: np.ndarray):
+    """
+    Paint every `t` with the color `t` of the way from (`h0`, `s0`, `l0`) to (`h1`, `s1`, `l1`), and write it to `out`.
+
+    `out` has shape (len(`t`), 3) and gets a red, green, and blue byte for each `t`.
+    This is `Hsl.interpolate` followed by `Hsl.to_packed_int`, one step for every `t`; see there for the details.
+    Painting has to give the same colors no matter which of the two does it, so any change to those has to be made here as well (and the other way around).
+    Every `t` is independent of the others, so they are split across all cores.
+    """
+    hue_delta = (h1 - h0) % 1.0
+    if hue_delta > 0.5:
+        hue_delta -= 1.0
+
+    for i in prange(len(t)):
+        hue = (h0 + t[i] * hue_delta) % 1.0
+        saturation = s0 + t[i] * (s1 - s0)
+        lightness = l0 + t[i] * (l1 - l0)
+
+        if saturation == 0.0:
+            red = green = blue = lightness
+        else:
+            if lightness <= 0.5:
+                m2 = lightness * (1.0 + saturation)
+            else:
+                m2 = lightness + saturation - (lightness * saturation)
+            m1 = 2.0 * lightness - m2
+            red = _hls_component(m1, m2, hue + ONE_THIRD)
+            green = _hls_component(m1, m2, hue)
+            blue = _hls_component(m1, m2, hue - ONE_THIRD)
+
+        # Rounded the same way as in `Rgb.to_int` and `Hsl.to_packed_int`.
+        out[i, 0] = int(255 * red + 0.5)
+        out[i, 1] = int(255 * green + 0.5)
+        out[i, 2] = int(255 * blue + 0.5)
@@ -19,9 +19,9 @@ def chart(width: int, height: int, maze_algorithm_constructor: MazeAlgorithm, pr
     measure_distance(maze, start_coordinates)
     # 4. Color the maze by interpolating between to colors based on the relative distance to the starting coordinates.
     palette = Palette(primary_color, secondary_color, transmission_constructor())
-    paint_maze(maze, palette)
-    # 5. Take the maze, extract the colors of each cell, and convert them to an image file.
-    save_color_data(destination, maze.cell_values())
+    img_data = paint_maze(maze, palette)
+    # 5. Take the colors of each cell and convert them to an image file.
+    save_color_data(destination, img_data)
 
 if __name__ == "__main__":
     args = parsed_args()
@@ -59,7 +59,7 @@ if __name__ == "__main__":
 #   Currently there is an implicit assumption in the measuring and painting steps that every single square will be part of the maze.
 #   Recursive backtracking will indeed always visit every square, but other algorithms might not.
 #   (Or you could introduce a backtracker version that quits after 80% of the cells is visited. Or something.)
-#   `measure_distance` is a depth-first search that will only visit cells connected to the starting cell.
+#   `measure_distance` is a breadth-first search that will only visit cells connected to the starting cell.
 #   Then you could adapt the painting algorithm to fill in the other squares with a background color just by adding an `else` statement to handle sentinel values left by `measure_distance`.
 # - Wackier transmissions.
 #   An easy way to get some fun color combinations is to just plug in some weird function, mathematically valid or not.
@@ -1,5 +1,5 @@
 from enum import IntFlag, auto
-from typing import Callable, Iterator, Optional, Self
+from typing import Iterator, Optional, Self
 import numpy as np
 import random
 
@@ -7,9 +7,8 @@ class UInt28(int):
     """
     A 28-bit integer.
 
-    Mazes are implemented as a numpy array of 32-bit integers.
-    Each integer denotes a cell; 4 bits are reserved for corridors (1 per direction).
-    That leaves 28 bits to store arbitrary values.
+    Mazes store an arbitrary value for every cell in a numpy array of 32-bit integers.
+    Only the lowest 28 bits of those integers are meant to be used.
 
     This class is used once: as an argument to `Cell.set_value`.
     Values belonging to this type can only be made through a constructor which will raise an exception if bits other than the first 28 are set.
@@ -19,19 +18,22 @@ class UInt28(int):
     # 28 set bits.
     MASK = 0xfffffff
 
-    def __init__(self, value: int):
+    def __new__(cls, value: int) -> Self:
+        # `UInt28` is an `int`, so the integer itself already holds the value; there's no need to store it a second time.
+        # That does mean the check has to happen here rather than in `__init__`, because `int`s are immutable.
         if value & ~UInt28.MASK != 0:
             raise Exception(f"{value} does not fit in a 28-bit integer")
-        self.value = value
+        return super().__new__(cls, value)
 
     def clamped(value: int) -> Self:
-        return UInt28(value & UInt28.MASK)
+        # Masking already guarantees the value fits, so skip the check.
+        return int.__new__(UInt28, value & UInt28.MASK)
 
     def to_int(self) -> int:
-        return self.value
+        return int(self)
 
     def __repr__(self) -> str:
-        return f"UInt28({self.value})"
+        return f"UInt28({int(self)})"
 
 class Point:
     """
@@ -62,10 +64,26 @@ class Point:
     def __repr__(self) -> str:
         return f"Point({self.x}, {self.y})"
 
-# Maze corridors are stored in the lowest 4 bits of a cell.
-CORRIDORS_MASK = 0xf
-# Length of the bit mask. (ie. 4 bits.)
-CORRIDORS_WIDTH = 4
+# Maze corridors are stored as two bit-flags per cell.
+# The south bit says whether a cell connects to the cell below it, the east bit whether it connects to the cell to its right.
+SOUTH_BIT = 0b01
+EAST_BIT = 0b10
+
+# Everything there is to know about directions, as flat arrays.
+# The index into each array is the index of a direction: 0 for north, 1 for east, 2 for south, and 3 for west. (See `Direction.index`.)
+# Looping over `range(4)` with these avoids creating `Direction`s and `Point`s in tight loops, and Numba kernels can use them as-is.
+#
+# The unit vector of each direction.
+DIR_DX = np.array([0, 1, 0, -1], dtype=np.int32)
+DIR_DY = np.array([-1, 0, 1, 0], dtype=np.int32)
+# The bit-flag of the opposite of each direction.
+DIR_OPP = np.array([4, 8, 1, 2], dtype=np.uint8)
+# Where the corridor going into each direction is stored, relative to the cell it starts from.
+# That is the bit `DIR_CORRIDOR_BIT[i]` of `corridors[y + DIR_CY[i], x + DIR_CX[i]]`.
+# North and west corridors are stored by the neighbors in those directions, hence the offsets.
+DIR_CORRIDOR_BIT = np.array([SOUTH_BIT, EAST_BIT, SOUTH_BIT, EAST_BIT], dtype=np.uint8)
+DIR_CX = np.array([0, 0, 0, -1], dtype=np.int32)
+DIR_CY = np.array([-1, 0, 0, 0], dtype=np.int32)
 
 class Direction(IntFlag):
     NORTH = auto()
@@ -76,43 +94,23 @@ class Direction(IntFlag):
     def all() -> Iterator[Self]:
         return Direction.__members__.values()
 
+    def index(self) -> int:
+        """
+        The index of this direction in the `DIR_*` arrays.
+        Directions are single bit-flags, so that is just the position of the bit.
+        """
+        return self.bit_length() - 1
+
     def delta(self) -> Point:
         """
         Returns the unit vector corresponding to a direction.
         In other words, the vector that, if added to another vector, creates a new vector one step into the direction of `self`.
         """
-        match self:
-            case Direction.NORTH:
-                return Point(0, -1)
-            case Direction.EAST:
-                return Point(1, 0)
-            case Direction.SOUTH:
-                return Point(0, 1)
-            case Direction.WEST:
-                return Point(-1, 0)
+        i = self.index()
+        return Point(int(DIR_DX[i]), int(DIR_DY[i]))
 
     def opposite(self) -> Self:
-        match self:
-            case Direction.NORTH:
-                return Direction.SOUTH
-            case Direction.EAST:
-                return Direction.WEST
-            case Direction.SOUTH:
-                return Direction.NORTH
-            case Direction.WEST:
-                return Direction.EAST
-
-    def __invert__(self) -> Self:
-        """
-        This function is mainly here because my Python is lacking.
-        `Direction` subclasses IntFlag, meaning that all directions are also bit-flag integers.
-        Unfortunately it seems that the invert operation is capped to the number of bits actually used.
-        In other words, ~0x1 is 0xe, not 0xfffffffe.
-        The difference is important because, as part of some operations, the inverted value will be AND-ed together with a 32-bit integer.
-        If limited to 4 bits, that means we'd lose data.
-        The fix is simple though: convert the bit-flag to a bare integer and inverting that one.
-        """
-        return ~int(self)
+        return Direction(int(DIR_OPP[self.index()]))
 
 class Maze:
     def __init__(self, width: int, height: int):
@@ -121,7 +119,23 @@ class Maze:
 
         All cells are initialized with a value of `0` and with no connections to other cells.
         """
-        self.data = np.zeros((width, height), dtype=np.uint32)
+        # The data is stored row by row, like the pixels of an image, so it is indexed as `[y, x]`.
+        # That way cells next to each other on the same row are also next to each other in memory.
+        #
+        # Mazes are a-directional graphs, so a corridor from a cell to its northern neighbor is the same as the corridor from that neighbor to its southern neighbor.
+        # Storing both would be redundant, so cells only store their corridors to the south and east.
+        # The corridors to the north and west are stored by the neighbors in those directions.
+        # That makes `SOUTH_BIT` of `corridors[y, x]` the corridor between (x, y) and (x, y + 1), and `EAST_BIT` the corridor between (x, y) and (x + 1, y).
+        # Both bits fit in a single byte per cell, so building a maze only needs to touch a quarter of the memory a 32-bit integer per cell would.
+        self.corridors = np.zeros((height, width), dtype=np.uint8)
+        # Values are stored separately, so they can be read and written without touching the corridors.
+        self.values = np.zeros((height, width), dtype=np.uint32)
+        # Bounds checks happen for every neighbor of every cell, so keep the size around as plain integers.
+        self._width = width
+        self._height = height
+        # The largest value of any cell, or `None` if it has to be looked up again. (See `max_value`.)
+        # A new maze has nothing but zeros, so that one is known from the start.
+        self._max_value: Optional[int] = 0
 
     def shape(self) -> Point:
         """
@@ -130,10 +144,13 @@ class Maze:
         Technically a `Point` and a `Size` are different things, but since they are implemented much the same way a `Point` will have to do.
         This is not a game engine.
         """
-        return Point.from_tuple(self.data.shape)
+        return Point(self._width, self._height)
 
     def in_bounds(self, coordinates: Point) -> bool:
-        return coordinates.x >= 0 and coordinates.x < self.shape().x and coordinates.y >= 0 and coordinates.y < self.shape().y
+        return self._in_bounds(coordinates.x, coordinates.y)
+
+    def _in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self._width and 0 <= y < self._height
 
     def __getitem__(self, coordinates: Point) -> Optional["Cell"]:
         """
@@ -144,53 +161,119 @@ class Maze:
         else:
             return None
 
-    def _get_and_maybe_mutate_cell(self, coordinates: Point, mutate_cell: Callable[[int], Optional[int]]) -> int:
+    # The methods below are the only places (besides the Numba kernels) that touch `corridors` and `values` directly.
+    # They take bare integer coordinates, so tight loops don't need to create `Point`s or `Cell`s just to look at a cell.
+
+    def _read(self, x: int, y: int) -> int:
+        """
+        Returns the value of the cell at (`x`, `y`).
+        """
+        return int(self.values[y, x])
+
+    def _set_value(self, x: int, y: int, value: int):
+        """
+        Sets the value of the cell at (`x`, `y`) to `value`.
         """
-        Gets the cell stored at `coordinates` and feeds its integer representation to `mutate_cell`.
-        The return value depends on the result:
+        self.values[y, x] = value
+        # This might have changed the largest value.
+        self.values_changed()
 
-        - If `mutate_cell` returns `None`, this method returns the cell's integer value.
-        - Otherwise update the cell's value to be the result of `mutate_cell`, then return that value.
+    def _corridor_index(self, x: int, y: int, i: int) -> Optional[tuple[int, int, int]]:
+        """
+        Returns where the corridor going from (`x`, `y`) into the direction with index `i` is stored, or `None` if that corridor would leave the maze.
+        That is a tuple of the coordinates into `corridors` (`y` first) and the bit-flag for the corridor.
+        """
+        if not self._in_bounds(x, y) or not self._in_bounds(x + int(DIR_DX[i]), y + int(DIR_DY[i])):
+            return None
 
-        Admittedly this is probably the dumbest thing in the whole codebase.
-        There is only one reason it is here and that reason is that I wanted only one access point to the inner data field rather than two.
-        (One for reading, one for writing.)
-        Fewer accesses == fewer chances for bugs to sneak in.
+        return (y + int(DIR_CY[i]), x + int(DIR_CX[i]), int(DIR_CORRIDOR_BIT[i]))
 
-        Waaaayyy over-engineered, though.
+    def _has_corridor(self, x: int, y: int, i: int) -> bool:
         """
-        coordinates = coordinates.to_tuple()
-        value = self.data[coordinates]
+        Whether the cell at (`x`, `y`) has a corridor going into the direction with index `i`.
+        """
+        index = self._corridor_index(x, y, i)
+        if index is None:
+            return False
+        (cy, cx, bit) = index
+        return bool(self.corridors[cy, cx] & bit)
 
-        mutated_value = mutate_cell(value)
-        if mutated_value:
-            self.data[coordinates] = mutated_value
-            return mutated_value
-        else:
-            return value
+    def _has_any_corridor(self, x: int, y: int) -> bool:
+        """
+        Whether the cell at (`x`, `y`) has a corridor going into any direction.
+        """
+        # The corridors south and east are both in this cell's own byte, so a single read covers both.
+        # Only the corridors north and west need a read of the neighbors that store them.
+        return bool(
+            self.corridors[y, x]
+            or (y > 0 and self.corridors[y - 1, x] & SOUTH_BIT)
+            or (x > 0 and self.corridors[y, x - 1] & EAST_BIT)
+        )
+
+    def _set_corridor(self, x: int, y: int, i: int, is_open: bool):
+        """
+        Opens or closes the corridor from the cell at (`x`, `y`) into the direction with index `i`.
+        """
+        # Only mutate if a cell exists in that direction.
+        # Can't make corridors on the edges of the maze!
+        index = self._corridor_index(x, y, i)
+        if index is not None:
+            (cy, cx, bit) = index
+            # Since corridors are stored once for both cells they connect, this opens (or closes) the corridor from the neighboring cell to this cell as well.
+            if is_open:
+                self.corridors[cy, cx] |= bit
+            else:
+                # `~bit` would be a negative Python integer, which numpy refuses to combine with an 8-bit unsigned integer.
+                # Inverting an 8-bit integer gives the 8-bit mask we want instead.
+                self.corridors[cy, cx] &= ~np.uint8(bit)
 
     def cells(self) -> Iterator["Cell"]:
-        for y in range(self.shape().y):
-            for x in range(self.shape().x):
+        for y in range(self._height):
+            for x in range(self._width):
                 yield Cell(self, Point(x, y))
 
     def cell_values(self) -> np.ndarray:
-        # The right-shift removes the 4 corridor bits.
-        return self.data >> CORRIDORS_WIDTH
+        # A read-only view rather than a copy, so looking at the values stays cheap.
+        # Writing through it would go around `values_changed` and leave `max_value` stale.
+        view = self.values.view()
+        view.flags.writeable = False
+        return view
+
+    def max_value(self) -> int:
+        """
+        The largest value of any cell in the maze.
+
+        Finding it means looking at every cell, so the result is kept around until a value changes.
+        Code that writes to `values` directly has to call `values_changed` afterwards.
+        """
+        if self._max_value is None:
+            self._max_value = int(self.values.max())
+        return self._max_value
+
+    def values_changed(self, max_value: Optional[int] = None):
+        """
+        Lets the maze know that `values` changed.
+
+        Pass the new largest value as `max_value` if it is known, which saves `max_value` from looking for it.
+        """
+        self._max_value = max_value
 
     def __repr__(self) -> str:
-        display = " " + ("_" * (2 * self.shape().x - 1)) + "\n"
+        display = " " + ("_" * (2 * self._width - 1)) + "\n"
 
-        for y in range(self.shape().y):
+        for y in range(self._height):
             display += "|"
 
-            for x in range(self.shape().x):
-                cell = self[Point(x, y)]
+            # Read the whole row at once, as plain Python integers.
+            # Going through `Cell.has_corridor` instead would read the same byte up to three times per cell.
+            row = self.corridors[y].tolist()
+            for x in range(self._width):
+                corridors = row[x]
 
-                display += " " if cell.has_corridor(Direction.SOUTH) else "_"
-                if cell.has_corridor(Direction.EAST):
-                    next_cell = self[Point(x + 1, y)]
-                    display += " " if (cell.has_corridor(Direction.SOUTH) or next_cell.has_corridor(Direction.SOUTH)) else "_"
+                display += " " if corridors & SOUTH_BIT else "_"
+                if corridors & EAST_BIT:
+                    # A corridor to the east means there is a next cell.
+                    display += " " if (corridors | row[x + 1]) & SOUTH_BIT else "_"
                 else:
                     display += "|"
 
@@ -205,81 +288,35 @@ class Cell:
         self.maze = maze
         self.coordinates = coordinates
 
-    def _data(self) -> int:
-        """
-        Gets the full 32-bit integer associated with this cell.
-
-        Each cell has a 32-bit integer associated with it.
-        This integer stores whether this cell has open corridors (lowest 4 bits), and an arbitrary 28-bit value set by the user.
-        In binary, that looks like so:
-
-        ```text
-        0b0000 0000 0000 0000 0000 0000 0000 0000
-          ^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^ ^^^^
-          |                                  +--- Corridor bits (4 bits, Direction values can be used as bit-flags for indexing)
-          +-------------------------------------- Arbitrary 28-bit value
-        ```
-        """
-        return int(self.maze._get_and_maybe_mutate_cell(self.coordinates, lambda _: None))
-
     def set_value(self, value: UInt28):
         # See the description of `UInt28` for why this check is here.
         if not isinstance(value, UInt28):
             raise Exception(f"{value} is not of type UInt28")
-        # Brief explanation of bit-twiddling.
-        # We want to set remove the previous value and then set the new one.
-        # However, we do need to keep the current corridor status.
-        # By AND-ing the previous value (which has the corridors) with a bit mask that has 1s for just the corridor bits, we keep those and get 0s for the other 28.
-        # Then we take the new 28-bit value and shift it left 4 bits.
-        # Now it has 0s for the 4 lower bits.
-        # OR them together and you get the new value.
-        self.maze._get_and_maybe_mutate_cell(self.coordinates, lambda previous_value: (previous_value & CORRIDORS_MASK) | (value.to_int() << CORRIDORS_WIDTH))
+        self.maze._set_value(self.coordinates.x, self.coordinates.y, value.to_int())
 
     def value(self) -> int:
-        return self._data() >> CORRIDORS_WIDTH
-
-    def _mutate_corridor(self, direction: Direction, mutate: Callable[[int, Direction], int]):
-        """
-        Adjusts the status of a corridor bit as directed by `mutate`.
-
-        `mutate` takes the current integer and a direction and it returns the new integer.
-
-        This construction is not really necessary, but it means I don't have to duplicate (mostly the same code) for `{open, close}_corridor`.
-        """
-        # Get the coordinates of the neighboring cell.
-        neighbor_coordinates = self.coordinates + direction.delta()
-        # Only mutate if a cell exists in that direction.
-        # Can't make corridors on the edges of the maze!
-        if self.maze[neighbor_coordinates]:
-            # Mutate the corridor from this cell to the neighboring cell.
-            self.maze._get_and_maybe_mutate_cell(self.coordinates, lambda value: mutate(value, direction))
-            # Mutate the corridor from neighboring cell to this cell.
-            #
-            # Mazes are a-directional graphs, technically.
-            # Still, this representation is directional.
-            # It could be made a-directional by storing only 2 directions (like east & south) per cell.
-            # However, that would make some checks more difficult.
-            # For example, you would need to query neighboring cells if you want to know if this cell has a corridor connecting to the west or north.
-            # That's more trouble than I thought it's worth (saving 2 bits per cell).
-            self.maze._get_and_maybe_mutate_cell(neighbor_coordinates, lambda value: mutate(value, direction.opposite()))
+        return self.maze._read(self.coordinates.x, self.coordinates.y)
 
     def open_corridor(self, direction: Direction):
-        # Open a corridor if it is not already open by OR-ing with the relevant direction bit-flag.
-        self._mutate_corridor(direction, lambda value, direction: value | direction)
+        self.maze._set_corridor(self.coordinates.x, self.coordinates.y, direction.index(), True)
 
     def close_corridor(self, direction: Direction):
-        # Close a corridor by AND-ing with a bit-mask that has all bits except the bit for that corridor set.
-        self._mutate_corridor(direction, lambda value, direction: value & ~direction)
+        self.maze._set_corridor(self.coordinates.x, self.coordinates.y, direction.index(), False)
+
+    def _has_corridor(self, i: int) -> bool:
+        """
+        Like `has_corridor`, but for the direction with index `i`.
+        """
+        return self.maze._has_corridor(self.coordinates.x, self.coordinates.y, i)
 
     def has_corridor(self, direction: Direction) -> bool:
-        return self._data() & direction
+        return self._has_corridor(direction.index())
 
     def has_neighbors(self) -> bool:
-        return self._data() & CORRIDORS_MASK != 0
+        return self.maze._has_any_corridor(self.coordinates.x, self.coordinates.y)
 
     def reachable_neighbors(self) -> Iterator[Self]:
-        for direction in Direction.all():
-            if self.has_corridor(direction):
-                neighbor = self.maze[self.coordinates + direction.delta()]
-                if neighbor:
-                    yield neighbor
+        for i in range(4):
+            if self._has_corridor(i):
+                # `_has_corridor` already checked the neighbor exists.
+                yield Cell(self.maze, Point(self.coordinates.x + int(DIR_DX[i]), self.coordinates.y + int(DIR_DY[i])))
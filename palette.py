@@ -1,20 +1,24 @@
 import random
-from maze import Maze, UInt28
-from tqdm import tqdm
-from typing import Self, Union
+from algorithm_numba import ONE_SIXTH, ONE_THIRD, TWO_THIRD, pack_rgb, paint_lut
+from maze import Maze
+from typing import NamedTuple, Self, Union
 import colorsys
-import re
-from transmission import Transmission
+import numpy as np
+from transmission import Linear, Transmission
 
-class Rgb:
+# The characters `Rgb.parse` accepts, in either case.
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+class Rgb(NamedTuple):
     """
     A color in the red-green-blue color model.
     Each component is in the range `[0.0, 1.0]`.
+
+    Colors never change once made, so this is a `NamedTuple`: no `__dict__` per color, and it unpacks like `(red, green, blue) = color`.
     """
-    def __init__(self, red: float, green: float, blue: float):
-        self.red = red
-        self.green = green
-        self.blue = blue
+    red: float
+    green: float
+    blue: float
 
     def parse(text: str) -> Self:
         # It is quite common for RGB to use integer representations in the range [0, 256).
@@ -22,36 +26,28 @@ class Rgb:
         # This helper function converts the former to the latter.
         def rgb_from_int(red: int, green: int, blue: int) -> Rgb:
             return Rgb(red / 255, green / 255, blue / 255)
-        # Replace uppercase characters by lowercase ones to make string matching case-insensitive.
-        text = text.lower()
-        # If the text is 6 hexadecimal characters, treat pairs of hexadecimals as integers in the order R -> G -> B.
-        # So `ff8800` => `Rgb('ff', '88', '00')` => `Rgb(1.0, 0.53, 0.0)`.
-        match = re.fullmatch("([0-9a-f]{2})([0-9a-f]{2})([0-9a-f]{2})", text)
-        if match:
-            r = int(match.group(1), 16)
-            g = int(match.group(2), 16)
-            b = int(match.group(3), 16)
-            return rgb_from_int(r, g, b)
-        # If the text is 3 hexadecimal characters, duplicate each digit, then do as the previous case.
-        # So `f80` => `Rgb('ff', '88', '00')` => `Rgb(1.0, 0.53, 0.0)`.
-        match = re.fullmatch("([0-9a-f])([0-9a-f])([0-9a-f])", text)
-        if match:
-            r = int(match.group(1) * 2, 16)
-            g = int(match.group(2) * 2, 16)
-            b = int(match.group(3) * 2, 16)
-            return rgb_from_int(r, g, b)
-        # If the text is 2 hexadecimal characters, then make this a grayscale number (red component == green component == blue component).
-        # So `88` => `Rgb('88', '88', '88')` => `Rgb(0.53, 0.53, 0.53)`.
-        match = re.fullmatch("[0-9a-f]{2}", text)
-        if match:
-            v = int(match.group(0), 16)
-            return rgb_from_int(v, v, v)
-        # If the text is 1 hexadecimal character, then duplicate that character then do as the previous case.
-        # So `8` => `Rgb('88', '88', '88')` => `Rgb(0.53, 0.53, 0.53)`.
-        match = re.fullmatch("[0-9a-f]", text)
-        if match:
-            v = int(match.group(0) * 2, 16)
-            return rgb_from_int(v, v, v)
+        # Every format below is a plain hexadecimal number; they only differ in length.
+        # So parse the whole text as a single integer, then pick the components out of it based on the length.
+        # `int` is a bit too lenient (it allows signs, underscores, and whitespace), so check the characters first.
+        n = len(text)
+        if n in (1, 2, 3, 6) and _HEX_DIGITS.issuperset(text):
+            v = int(text, 16)
+            # If the text is 6 hexadecimal characters, treat pairs of hexadecimals as integers in the order R -> G -> B.
+            # So `ff8800` => `Rgb('ff', '88', '00')` => `Rgb(1.0, 0.53, 0.0)`.
+            if n == 6:
+                return rgb_from_int(v >> 16 & 0xff, v >> 8 & 0xff, v & 0xff)
+            # If the text is 3 hexadecimal characters, duplicate each digit, then do as the previous case.
+            # So `f80` => `Rgb('ff', '88', '00')` => `Rgb(1.0, 0.53, 0.0)`.
+            # Duplicating a hexadecimal digit is the same as multiplying it by 0x11.
+            if n == 3:
+                return rgb_from_int((v >> 8 & 0xf) * 0x11, (v >> 4 & 0xf) * 0x11, (v & 0xf) * 0x11)
+            # If the text is 2 hexadecimal characters, then make this a grayscale number (red component == green component == blue component).
+            # So `88` => `Rgb('88', '88', '88')` => `Rgb(0.53, 0.53, 0.53)`.
+            if n == 2:
+                return rgb_from_int(v, v, v)
+            # If the text is 1 hexadecimal character, then duplicate that character then do as the previous case.
+            # So `8` => `Rgb('88', '88', '88')` => `Rgb(0.53, 0.53, 0.53)`.
+            return rgb_from_int(v * 0x11, v * 0x11, v * 0x11)
         # If none of these cases are valid, blame the user.
         raise Exception(f"cannot parse {text} as RGB")
 
@@ -60,15 +56,20 @@ class Rgb:
         return Hsl(hue, saturation, lightness)
 
     def to_int(self) -> int:
-        red = int(round(255 * self.red))
-        green = int(round(255 * self.green))
-        blue = int(round(255 * self.blue))
+        # Adding 0.5 and truncating rounds to the nearest integer without a call to `round`.
+        # (Halves round up rather than to even, which makes no visible difference.)
+        # Components are in the range [0.0, 1.0], give or take some floating-point drift from conversions.
+        # That drift is far smaller than 0.5 / 255, so the results stay in the range [0, 255] without clamping.
+        # `Hsl.to_packed_int` and `paint_lut` round the same way; keep all three in sync.
+        red = int(255 * self.red + 0.5)
+        green = int(255 * self.green + 0.5)
+        blue = int(255 * self.blue + 0.5)
         return red << 16 | green << 8 | blue
 
     def __repr__(self) -> str:
         return f"Rgb({self.red}, {self.green}, {self.blue})"
 
-class Hsl:
+class Hsl(NamedTuple):
     """
     A color in the hue-saturation-lightness color model.
     Each component is in the range `[0.0, 1.0]`.
@@ -100,47 +101,66 @@ class Hsl:
     Slanted cubes do poorly with height, so let's imagine it is a cylinder instead.
     (And torture the numbers a bit so it makes mathematical sense.)
     Lightness is the 3rd coordinate that says where our color is situated between the plane of black (0.0) and white (1.0).
+
+    Like `Rgb`, this is a `NamedTuple`.
     """
-    def __init__(self, hue: float, saturation: float, lightness: float):
-        self.hue = hue
-        self.saturation = saturation
-        self.lightness = lightness
+    hue: float
+    saturation: float
+    lightness: float
 
     def random() -> Self:
-        return Hsl(random.random(), random.random(), random.random())
+        # Draw the bits for all three components at once, then slice off 24 bits for each.
+        # One call into the random generator instead of three; 24 bits is still far more precision than 8-bit color channels can show.
+        bits = random.getrandbits(72)
+        return Hsl(
+            (bits >> 48 & 0xffffff) / 0x1000000,
+            (bits >> 24 & 0xffffff) / 0x1000000,
+            (bits & 0xffffff) / 0x1000000,
+        )
 
     def to_rgb(self) -> Rgb:
-        (red, green, blue) = colorsys.hls_to_rgb(self.hue, self.lightness, self.saturation)
+        (red, green, blue) = _hls_to_rgb(self.hue, self.lightness, self.saturation)
         return Rgb(red, green, blue)
 
+    def to_packed_int(self) -> int:
+        """
+        Same as `self.to_rgb().to_int()`, without making an `Rgb` in between.
+        """
+        (red, green, blue) = _hls_to_rgb(self.hue, self.lightness, self.saturation)
+        # Rounded the same way as in `Rgb.to_int` and `paint_lut`.
+        return int(255 * red + 0.5) << 16 | int(255 * green + 0.5) << 8 | int(255 * blue + 0.5)
+
     def to_hsl(self) -> Self:
         return self
 
     def interpolate(a: Self, b: Self, t: float) -> Self:
-        def interpolate_line(a: float, b: float, t: float) -> float:
-            # Linear interpolation, or `lerp`, as it is sometimes known.
-            #
-            # Given two values and a coefficient `t` in the range [0.0, 1.0], linear interpolation finds the value `t`% between the two.
-            # `interpolate_line(a, b, 0.5)` is the mean, `interpolate_line(a, b, 0.25)` and `interpolate_line(a, b, 0.75)` are quarts, etc.
-            return t * a + (1.0 - t) * b
-
-        def interpolate_angle(a: float, b: float, t: float) -> float:
-            # Hue is an angle, and angles operate on circular algebra, not linear algebra.
-            # If you go along the edge of a circle, you can get from one point to another in two ways: clockwise or counterclockwise.
-            # This is relevant if you have hues of, say, 0.0 (red) and 0.66 (blue).
-            # You could pass clockwise through 0.1 => 0.2 => ... => 0.6 => 0.66, but that would be a literal roundabout way of going about.
-            # (Color-wise that would be something like red => orange => yellow => chartreuse => green => aqua => blue.)
-            # Instead, consider you could wrap around from 0.0, which is also 1.0, to 0.9 => 0.8 => 0.7 and reach your destination in a shorter distance and with a more fitting color palette.
-            # (In this case, red => purple => violet => blue.)
-            delta = abs(a - b)
-            min_delta = min(delta, 2 - delta)
-            # Since we are on a circle, all operations are modulo 1.0: `(0.2 - 0.5 = 0.8)`.
-            return (a + t * min_delta) % 1.0
+        """
+        Returns the color `t` of the way from `a` to `b`: `a` itself if `t` is 0.0, and `b` if `t` is 1.0.
 
+        Nothing in here but arithmetic, so `t` can just as well be a numpy array, in which case so are the components of the result.
+        `paint_lut` in `algorithm_numba.py` repeats this arithmetic for whole tables of colors, so keep the two in sync.
+        """
+        # Hue is an angle, and angles operate on circular algebra, not linear algebra.
+        # If you go along the edge of a circle, you can get from one point to another in two ways: clockwise or counterclockwise.
+        # This is relevant if you have hues of, say, 0.0 (red) and 0.66 (blue).
+        # You could pass clockwise through 0.1 => 0.2 => ... => 0.6 => 0.66, but that would be a literal roundabout way of going about.
+        # (Color-wise that would be something like red => orange => yellow => chartreuse => green => aqua => blue.)
+        # Instead, consider you could wrap around from 0.0, which is also 1.0, to 0.9 => 0.8 => 0.7 and reach your destination in a shorter distance and with a more fitting color palette.
+        # (In this case, red => purple => violet => blue.)
+        #
+        # Since we are on a circle, all operations are modulo 1.0: `(0.2 - 0.5 = 0.7)`.
+        # So going from `a` to `b` the "positive" way around is a step of `(b - a) % 1.0`.
+        # If that is more than half the circle, going the other way is shorter, which is a (negative) step of that minus 1.0.
+        hue_delta = (b.hue - a.hue) % 1.0
+        if hue_delta > 0.5:
+            hue_delta -= 1.0
+
+        # The other components are linearly interpolated, or `lerp`ed, as it is sometimes known.
+        # `t` = 0.5 gives the mean, `t` = 0.25 and `t` = 0.75 the quarts, etc.
         return Hsl(
-            interpolate_angle(a.hue, b.hue, t),
-            interpolate_line(a.saturation, b.saturation, t),
-            interpolate_line(a.lightness, b.lightness, t),
+            (a.hue + t * hue_delta) % 1.0,
+            a.saturation + t * (b.saturation - a.saturation),
+            a.lightness + t * (b.lightness - a.lightness),
         )
 
     def __repr__(self) -> str:
@@ -151,19 +171,111 @@ class Palette:
         self.start_color = start_color
         self.end_color = end_color
         self.transmission = transmission
+        # Transmissions don't hold any state, so binding their method once saves looking it up on every call to `paint`.
+        self._transmit = transmission.transmit
+        # `Linear` is the default, and it returns `t` as-is.
+        # So when it is used, skip calling it altogether.
+        # This checks for `Linear` itself only: a subclass might override `transmit`, and then it does have to be called.
+        self._is_linear = type(transmission) is Linear
+        if self._is_linear:
+            self.paint = self._paint_transmitted_one
 
     def paint(self, t: float) -> int:
-        return Hsl.interpolate(self.start_color, self.end_color, self.transmission.transmit(t)).to_rgb().to_int()
+        return self._paint_transmitted_one(self._transmit(t))
+
+    def _paint_transmitted_one(self, t: float) -> int:
+        """
+        Like `paint`, but for a `t` that already went through the transmission, so without it.
+        """
+        return Hsl.interpolate(self.start_color, self.end_color, t).to_packed_int()
+
+    def paint_array(self, t: np.ndarray) -> np.ndarray:
+        """
+        Like `paint`, but for a whole array of `t`s at once.
+
+        Returns an array of shape (len(`t`), 3) with a red, green, and blue byte for each `t`.
+        """
+        buckets = self.transmission.quantized_buckets()
+        if buckets is not None:
+            # The transmission rounds `t` to one of a few values, so there are only that many colors to paint.
+            # Those colors still come from the transmission itself (a subclass might do more than round), applied to the `t` each bucket rounds to.
+            # Rounding `t` to the index of its bucket then gives the index of its color.
+            # That rounding is the same one `Round` and `Piecewise10` do, so every `t` ends up in the bucket the transmission would have put it in.
+            centers = (np.arange(buckets) / (buckets - 1)).tolist()
+            colors = self._paint_transmitted(np.array([self._transmit(t) for t in centers], dtype=np.float64))
+            return colors[np.rint(t * (buckets - 1)).astype(np.intp)]
+
+        if self._is_linear:
+            # `t` stays as it is, and painting `t`s that are all different (like the distances in `paint_maze`) gains nothing from looking for duplicates.
+            return self._paint_transmitted(t)
+
+        t = self.transmission.transmit_array(t)
+        # Other transmissions may still map lots of `t`s to the same value.
+        # Equal `t`s get equal colors, so paint every distinct `t` once and copy the colors to their duplicates afterwards.
+        # Finding the copies is a search through the distinct `t`s, so skip it when there are no duplicates to begin with.
+        distinct = np.unique(t)
+        if len(distinct) < len(t):
+            return self._paint_transmitted(distinct)[np.searchsorted(distinct, t)]
+        return self._paint_transmitted(t)
 
-def paint_maze(maze: Maze, palette: Palette):
+    def _paint_transmitted(self, t: np.ndarray) -> np.ndarray:
+        """
+        Like `paint_array`, but for `t`s that already went through the transmission, so without it.
+        """
+        lut = np.empty((len(t), 3), dtype=np.uint8)
+        # Every color in the table is independent of the others, which makes this a job for a Numba kernel.
+        start = self.start_color
+        end = self.end_color
+        paint_lut(t, start.hue, start.saturation, start.lightness, end.hue, end.saturation, end.lightness, lut)
+        return lut
+
+def _hls_to_rgb(hue: float, lightness: float, saturation: float) -> tuple[float, float, float]:
+    """
+    `colorsys.hls_to_rgb`, with its helper for each component written out in place.
+
+    `paint_lut` does the same for whole tables, with that helper as `_hls_component`; keep the two in sync.
+    """
+    if saturation == 0.0:
+        return (lightness, lightness, lightness)
+    if lightness <= 0.5:
+        m2 = lightness * (1.0 + saturation)
+    else:
+        m2 = lightness + saturation - (lightness * saturation)
+    m1 = 2.0 * lightness - m2
+    delta = m2 - m1
+
+    # Each component follows the same curve, but a third of a turn apart: up from `m1` to `m2`, flat at `m2`, down to `m1`, and flat at `m1`.
+    h = (hue + ONE_THIRD) % 1.0
+    red = m1 + delta * h * 6.0 if h < ONE_SIXTH else m2 if h < 0.5 else m1 + delta * (TWO_THIRD - h) * 6.0 if h < TWO_THIRD else m1
+    h = hue % 1.0
+    green = m1 + delta * h * 6.0 if h < ONE_SIXTH else m2 if h < 0.5 else m1 + delta * (TWO_THIRD - h) * 6.0 if h < TWO_THIRD else m1
+    h = (hue - ONE_THIRD) % 1.0
+    blue = m1 + delta * h * 6.0 if h < ONE_SIXTH else m2 if h < 0.5 else m1 + delta * (TWO_THIRD - h) * 6.0 if h < TWO_THIRD else m1
+    return (red, green, blue)
+
+def paint_maze(maze: Maze, palette: Palette) -> np.ndarray:
+    """
+    Returns the colors of all cells in `maze` as an array of shape (height, width, 3), one byte per color channel.
+    """
+    values = maze.cell_values()
     # Get the maximum value so we can use it to interpolate.
     # -1 to compensate for the +1 introduced by `measure_distance`.
-    max_value = max(cell.value() for cell in maze.cells()) - 1
-
-    for cell in tqdm(maze.cells(), desc="paint pixels", total=maze.shape().x * maze.shape().y):
-        value = cell.value()
-        if value != 0:
-            # -1 to compensate for the +1 introduced by `measure_distance`.
-            value = value - 1
-            color = palette.paint(value / max_value)
-            cell.set_value(UInt28(color))
+    # (A maze of a single cell has a maximum of 0; dividing by 1 instead gives it the primary color.)
+    max_value = max(maze.max_value() - 1, 1)
+
+    # Many cells share the same distance, and cells with the same distance get the same color.
+    # So rather than painting every cell, paint every distance once and store the colors in a lookup table.
+    # There's no need to collect which distances actually occur first: a breadth-first search reaches every distance up to the maximum, so the table has no gaps.
+    # A plain array indexed by distance then does the job of a dictionary, without hashing a thing.
+    # Cells with a value of 0 were never reached by `measure_distance`; they stay black.
+    lut = np.zeros((maze.max_value() + 1, 3), dtype=np.uint8)
+    # -1 to compensate for the +1 introduced by `measure_distance`.
+    lut[1:] = palette.paint_array(np.arange(len(lut) - 1) / max_value)
+
+    # Then look up the color of every cell in a single pass.
+    (height, width) = values.shape
+    img_data = np.empty((height, width, 3), dtype=np.uint8)
+    missing = pack_rgb(values, lut, img_data)
+    if missing > 0:
+        raise Exception(f"{missing} cells have a value above the maximum of {maze.max_value()}; was `values_changed` not called after writing to `values`?")
+    return img_data
@@ -11,16 +11,17 @@ def select_by_id[T](thing: str, items: List[T], id: str) -> T:
 
     This function is used to parse a maze building algorithm and a transmission function from a string input.
     """
-    # Replace uppercase characters by lowercase ones to make string matching case-insensitive.
-    lower_id = id.lower()
-    # Collect all items with the right ID.
-    # This should be just one item in most cases, since IDs are supposed to be unique.
-    items = [item for item in items if lower_id == item.id().lower()]
-
-    if len(items) == 0:
+    # Casefold both sides to make string matching case-insensitive.
+    # (`casefold` is `lower` made for exactly this: it also matches things like `ß` and `SS`.)
+    folded_id = id.casefold()
+    # Find the first item with the right ID.
+    # IDs are supposed to be unique, so there is no need to look any further than that.
+    match = next((item for item in items if folded_id == item.id().casefold()), None)
+
+    if match is None:
         raise Exception(f"unknown {thing}: {id}")
 
-    return items[0]
+    return match
 
 def parsed_args():
     parser = ArgumentParser(prog="Charty", description="Randomly generates map-like screensavers or images.", epilog="Bottom text")
@@ -0,0 +1,55 @@
+from algorithm import ALGORITHMS, TiledRecursiveBacktracker, measure_distance
+from algorithm_numba import TILE_SIZE
+from maze import EAST_BIT, SOUTH_BIT, Maze, Point
+import numpy as np
+import random
+
+# Every algorithm has to build a perfect maze: every cell can be reached from every other cell, in exactly one way.
+# For a maze of w x h cells that comes down to two things: all cells are connected, and there are exactly w * h - 1 corridors.
+#
+# `TiledRecursiveBacktracker` builds its tiles separately and then stitches them together, so the sizes below include mazes that
+# are smaller than a tile, exactly one tile, and a tile plus a bit in either or both directions.
+SIZES = [
+    (1, 1),
+    (7, 3),
+    (TILE_SIZE, TILE_SIZE),
+    (TILE_SIZE + 1, 1),
+    (1, 2 * TILE_SIZE + 2),
+    (2 * TILE_SIZE + 2, TILE_SIZE + 6),
+    (2 * TILE_SIZE + 1, TILE_SIZE + 1),
+]
+
+def count_corridors(maze: Maze) -> int:
+    # Every cell stores the corridors to its south and east neighbors as one bit each.
+    return int(np.count_nonzero(maze.corridors & SOUTH_BIT)) + int(np.count_nonzero(maze.corridors & EAST_BIT))
+
+def check_perfect_maze(algorithm_constructor, width: int, height: int):
+    random.seed(width * 1000 + height)
+    maze = Maze(width, height)
+    start_coordinates = Point.random(maze.shape())
+    algorithm_constructor().build(maze, start_coordinates)
+    name = f"{algorithm_constructor.id()} at {width}x{height}"
+
+    # There is nothing south of the last row, or east of the last column, to open a corridor to.
+    assert not (maze.corridors[-1, :] & SOUTH_BIT).any(), f"{name}: corridor out of the south border"
+    assert not (maze.corridors[:, -1] & EAST_BIT).any(), f"{name}: corridor out of the east border"
+    assert count_corridors(maze) == width * height - 1, f"{name}: {count_corridors(maze)} corridors"
+
+    # `measure_distance` only reaches cells connected to the start; the others keep a value of 0.
+    measure_distance(maze, start_coordinates)
+    assert (maze.cell_values() > 0).all(), f"{name}: not every cell can be reached"
+
+def test_algorithms_build_perfect_mazes():
+    for algorithm_constructor in ALGORITHMS:
+        for (width, height) in SIZES:
+            check_perfect_maze(algorithm_constructor, width, height)
+
+def test_tiled_recursive_backtracker_builds_perfect_mazes_of_any_size():
+    # Tile edges are where stitching goes wrong, so walk over sizes that end at every position within a tile.
+    for extra in range(0, TILE_SIZE, 7):
+        check_perfect_maze(TiledRecursiveBacktracker, TILE_SIZE + extra, 2 * TILE_SIZE - extra)
+
+if __name__ == "__main__":
+    test_algorithms_build_perfect_mazes()
+    test_tiled_recursive_backtracker_builds_perfect_mazes_of_any_size()
+    print("ok")
@@ -0,0 +1,71 @@
+from palette import Hsl, Palette
+from transmission import TRANSMISSIONS, Linear, Round
+import numpy as np
+
+# `paint_maze` paints with `Palette.paint_array`, which takes a few shortcuts depending on the transmission.
+# None of those shortcuts should change a single color compared to painting every `t` on its own with `Palette.paint`.
+START = Hsl(0.9, 0.8, 0.3)
+END = Hsl(0.2, 0.4, 0.7)
+MAX_DISTANCES = [1, 2, 3, 10, 20, 100, 1000]
+
+def paint_one_by_one(palette: Palette, t: np.ndarray) -> np.ndarray:
+    colors = [palette.paint(t) for t in t.tolist()]
+    return np.array([(color >> 16 & 0xff, color >> 8 & 0xff, color & 0xff) for color in colors], dtype=np.uint8)
+
+class ReversedRound(Round):
+    """
+    Rounds like `Round`, but swaps the colors; painting has to notice the override.
+    """
+    def transmit(self, t: float) -> float:
+        return 1.0 - round(t)
+
+class ReversedLinear(Linear):
+    """
+    Like `Linear`, but backwards; painting has to notice the override rather than skip the transmission like it does for `Linear`.
+    """
+    def transmit(self, t: float) -> float:
+        return 1.0 - t
+
+    def transmit_array(self, t: np.ndarray) -> np.ndarray:
+        return 1.0 - t
+
+def test_paint_array_matches_paint():
+    for max_distance in MAX_DISTANCES:
+        t = np.arange(max_distance + 1) / max_distance
+        for transmission_constructor in TRANSMISSIONS + [ReversedRound, ReversedLinear]:
+            palette = Palette(START, END, transmission_constructor())
+            assert np.array_equal(palette.paint_array(t), paint_one_by_one(palette, t)), f"{transmission_constructor.__name__} at max distance {max_distance}"
+
+def test_overridden_linear_is_not_skipped():
+    palette = Palette(START, END, ReversedLinear())
+    # Reversed, `t` = 0.0 is the end color rather than the start color.
+    assert palette.paint(0.0) == END.to_packed_int()
+    t = np.array([0.0])
+    assert np.array_equal(palette.paint_array(t), paint_one_by_one(Palette(END, END, Linear()), t))
+
+def hue_distance(a: float, b: float) -> float:
+    # Hues wrap around, so 0.99 and 0.01 are only 0.02 apart.
+    return min((a - b) % 1.0, (b - a) % 1.0)
+
+def test_interpolate_ends_at_its_colors():
+    for (a, b) in [(START, END), (END, START), (Hsl(0.5, 0.1, 0.9), Hsl(0.2, 0.9, 0.1))]:
+        assert Hsl.interpolate(a, b, 0.0) == a
+        at_end = Hsl.interpolate(a, b, 1.0)
+        assert hue_distance(at_end.hue, b.hue) < 1e-12, f"{a} -> {b} ends at hue {at_end.hue}"
+        assert abs(at_end.saturation - b.saturation) < 1e-12
+        assert abs(at_end.lightness - b.lightness) < 1e-12
+
+def test_interpolate_takes_the_short_way_around():
+    # Going down from 0.5 to 0.2 must end at 0.2, not at 0.8.
+    assert hue_distance(Hsl.interpolate(Hsl(0.5, 0.5, 0.5), Hsl(0.2, 0.5, 0.5), 1.0).hue, 0.2) < 1e-12
+    assert hue_distance(Hsl.interpolate(Hsl(0.5, 0.5, 0.5), Hsl(0.2, 0.5, 0.5), 0.5).hue, 0.35) < 1e-12
+    # Going from 0.9 to 0.1 wraps through red at 0.0 rather than crossing cyan at 0.5.
+    assert hue_distance(Hsl.interpolate(Hsl(0.9, 0.5, 0.5), Hsl(0.1, 0.5, 0.5), 0.5).hue, 0.0) < 1e-12
+    assert hue_distance(Hsl.interpolate(Hsl(0.1, 0.5, 0.5), Hsl(0.9, 0.5, 0.5), 0.5).hue, 0.0) < 1e-12
+
+if __name__ == "__main__":
+    test_interpolate_ends_at_its_colors()
+    test_interpolate_takes_the_short_way_around()
+    test_paint_array_matches_paint()
+    test_overridden_linear_is_not_skipped()
+    print("ok")
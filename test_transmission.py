@@ -0,0 +1,27 @@
+from transmission import TRANSMISSIONS, Wave
+import numpy as np
+
+# Painting runs `transmit_array`, but `Palette.paint` runs `transmit`.
+# Both have to give the same `t`, or the color of a cell would depend on which of the two painted it.
+#
+# The `t`s below are the ones `paint_maze` uses for mazes with a few different maximum distances.
+# Multiples of 10 and 20 are in there on purpose: they hit the halves `Round` and `Piecewise10` have to round.
+MAX_DISTANCES = [1, 2, 3, 10, 20, 100, 101, 1000, 99991, 416035]
+
+def test_transmit_array_matches_transmit():
+    for max_distance in MAX_DISTANCES:
+        t = np.arange(max_distance + 1) / max_distance
+        for transmission_constructor in TRANSMISSIONS:
+            transmission = transmission_constructor()
+            expected = np.array([transmission.transmit(t) for t in t.tolist()], dtype=np.float64)
+            actual = transmission.transmit_array(t)
+            if transmission_constructor is Wave:
+                # `math.cos` and `np.cos` are different implementations, and on some CPUs numpy uses a vectorized one.
+                # They can disagree on the last bit, which no color can show, so allow for that (and only that).
+                assert np.allclose(actual, expected, rtol=0.0, atol=1e-15), f"{transmission_constructor.id()} at max distance {max_distance}"
+            else:
+                assert np.array_equal(actual, expected), f"{transmission_constructor.id()} at max distance {max_distance}"
+
+if __name__ == "__main__":
+    test_transmit_array_matches_transmit()
+    print("ok")
@@ -1,4 +1,6 @@
 from math import pi, cos
+from typing import Optional
+import numpy as np
 
 class Transmission:
     """
@@ -21,6 +23,41 @@ class Transmission:
     def transmit(self, t: float) -> float:
         raise NotImplementedError()
 
+    def transmit_array(self, t: np.ndarray) -> np.ndarray:
+        """
+        Like `transmit`, but for a whole array of `t`s at once.
+
+        This default calls `transmit` for every element, so new transmissions work without it.
+        Overriding it with numpy array operations is a lot faster, though.
+        An override has to give exactly the same result as `transmit` for every element, down to the last bit.
+        Otherwise images would depend on which of the two happened to be used.
+        The easiest way to get there is to use the very same arithmetic in both.
+        """
+        return np.fromiter(map(self.transmit, t.tolist()), dtype=np.float64, count=len(t))
+
+    def quantized_buckets(self) -> Optional[int]:
+        """
+        If this transmission rounds every `t` to the nearest of `n` evenly spaced values from 0.0 up to and including 1.0, returns `n`.
+
+        Such a transmission only ever produces `n` different colors, which painting can take advantage of.
+        Returns `None` for transmissions that don't round.
+
+        Painting trusts this completely: it puts every `t` in the bucket `round(t * (n - 1))` itself, and only calls `transmit` on one `t` per bucket.
+        So `transmit` must give the same result for every `t` in a bucket, and round halves to even just like `round` does.
+        A subclass that overrides `transmit` in a way that breaks that has to override this method as well, and return `None`.
+        """
+        return None
+
+def _pow10(t: float | np.ndarray) -> float | np.ndarray:
+    """
+    `t ** 10`, in a way that gives the exact same result for floats and numpy arrays.
+
+    Python's `**` and numpy's don't always agree on the last bit, but multiplication always does.
+    """
+    t2 = t * t
+    t4 = t2 * t2
+    return t4 * t4 * t2
+
 class Linear(Transmission):
     """
     A linear transmission.
@@ -36,6 +73,9 @@ class Linear(Transmission):
     def transmit(self, t: float) -> float:
         return t
 
+    def transmit_array(self, t: np.ndarray) -> np.ndarray:
+        return t
+
 class Wave(Transmission):
     """
     A waveform scaled and translated so it passes through (0.0, 0.0) and (1.0, 1.0).
@@ -47,7 +87,11 @@ class Wave(Transmission):
         return "Wave"
 
     def transmit(self, t: float) -> float:
-        return cos(pi * t + pi) / 2 + 0.5
+        # Shifting a cosine by half a turn flips its sign, so this is `cos(pi * t + pi) / 2 + 0.5` with one addition less.
+        return 0.5 - 0.5 * cos(pi * t)
+
+    def transmit_array(self, t: np.ndarray) -> np.ndarray:
+        return 0.5 - 0.5 * np.cos(pi * t)
 
 class Quadratic(Transmission):
     """
@@ -64,7 +108,11 @@ class Quadratic(Transmission):
         return "Quadratic"
 
     def transmit(self, t: float) -> float:
-        return t ** 2
+        # Rather than `t ** 2`; see `_pow10` for why.
+        return t * t
+
+    def transmit_array(self, t: np.ndarray) -> np.ndarray:
+        return t * t
 
 class Pow10(Transmission):
     """
@@ -82,7 +130,10 @@ class Pow10(Transmission):
         return "Pow10"
 
     def transmit(self, t: float) -> float:
-        return t ** 10
+        return _pow10(t)
+
+    def transmit_array(self, t: np.ndarray) -> np.ndarray:
+        return _pow10(t)
 
 class InversePow10(Transmission):
     """
@@ -95,7 +146,10 @@ class InversePow10(Transmission):
         return "InversePow10"
 
     def transmit(self, t: float) -> float:
-        return 1.0 - t ** 10
+        return 1.0 - _pow10(t)
+
+    def transmit_array(self, t: np.ndarray) -> np.ndarray:
+        return 1.0 - _pow10(t)
 
 class Round(Transmission):
     """
@@ -110,6 +164,13 @@ class Round(Transmission):
     def transmit(self, t: float) -> float:
         return round(t)
 
+    def transmit_array(self, t: np.ndarray) -> np.ndarray:
+        # Like `round`, `np.rint` rounds halves to even.
+        return np.rint(t)
+
+    def quantized_buckets(self) -> Optional[int]:
+        return 2
+
 class Piecewise10(Transmission):
     """
     A linearly interpolated palette composed of 10 equidistant colors.
@@ -121,7 +182,16 @@ class Piecewise10(Transmission):
         return "Piecewise10"
 
     def transmit(self, t: float) -> float:
-        return round(t, 1)
+        # Not `round(t, 1)`: that rounds the exact decimal value of `t`, which numpy has no equivalent for.
+        # (0.15 is really 0.1499999..., so `round(0.15, 1)` is 0.1, while `np.round(0.15, 1)` is 0.2.)
+        # Scaling up, rounding to an integer, and scaling back down is something both can do the exact same way.
+        return round(t * 10) / 10
+
+    def transmit_array(self, t: np.ndarray) -> np.ndarray:
+        return np.rint(t * 10) / 10
+
+    def quantized_buckets(self) -> Optional[int]:
+        return 11
 
 # This list has all the transmissions so the command-line parser knows about them.
 # If you write a new transmission, make sure to add it here!